@@ -164,7 +164,8 @@ class DouyinViralAnalyzer:
             dur = row[8]
             duration_dist[dur] = duration_dist.get(dur, 0) + 1
         
-        optimal_duration = max(duration_dist, key=duration_dist.get)
+        # 数量相同时取较短时长，保证结果确定
+        optimal_duration = min(duration_dist, key=lambda d: (-duration_dist[d], d))
         
         # 热门标签
         all_tags = []
@@ -176,7 +177,7 @@ class DouyinViralAnalyzer:
         for tag in all_tags:
             tag_counts[tag] = tag_counts.get(tag, 0) + 1
         
-        top_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_tags = sorted(tag_counts.items(), key=lambda x: (-x[1], x[0]))[:5]
         
         # 热门音乐
         music_counts = {}
@@ -184,7 +185,7 @@ class DouyinViralAnalyzer:
             music = row[10]
             music_counts[music] = music_counts.get(music, 0) + 1
         
-        top_music = sorted(music_counts.items(), key=lambda x: x[1], reverse=True)[:3]
+        top_music = sorted(music_counts.items(), key=lambda x: (-x[1], x[0]))[:3]
         
         # 分类分布
         category_dist = {}
@@ -192,7 +193,7 @@ class DouyinViralAnalyzer:
             cat = row[12]
             category_dist[cat] = category_dist.get(cat, 0) + 1
         
-        top_categories = sorted(category_dist.items(), key=lambda x: x[1], reverse=True)[:3]
+        top_categories = sorted(category_dist.items(), key=lambda x: (-x[1], x[0]))[:3]
         
         return {
             "total_videos": total_videos,
@@ -206,6 +207,25 @@ class DouyinViralAnalyzer:
             "top_categories": top_categories
         }
     
+    def get_tag_counts(self) -> List[tuple]:
+        """统计最近一天全部标签的使用次数"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT tags FROM videos
+            WHERE scraped_at >= datetime('now', '-1 day')
+        """)
+
+        tag_counts = {}
+        for (tags,) in cursor:
+            for tag in json.loads(tags):
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
+
+        conn.close()
+
+        return sorted(tag_counts.items(), key=lambda x: (-x[1], x[0]))
+
     def generate_report(self) -> str:
         """生成每日分析报告"""
         analysis = self.analyze_patterns()
@@ -21,6 +21,12 @@ from douyin_analyzer import DouyinViralAnalyzer
 # Import new modules
 from src.utils.config import Config
 from src.reporter.charts import ChartGenerator
+from src.analyzer.velocity import VelocityScorer, write_alerts_jsonl, read_alerts_jsonl
+from src.api.server import AnalysisServer
+from src.analyzer.partial import (
+    compute_partial, merge_partials, finalize_partial,
+    save_partial, load_partial, fanout_partials
+)
 
 console = Console()
 
@@ -61,13 +67,19 @@ def display_analysis_rich(analysis: dict):
     console.print(duration_table)
     
     # Top Tags
-    tags_table = Table(title="🏷️ 热门标签 / Top Tags", box=box.ROUNDED)
+    # Sketched tag counts from merged partials are lower bounds
+    tag_error = analysis.get('tag_error', 0)
+    tags_table = Table(
+        title="🏷️ 热门标签 / Top Tags",
+        caption=f"估算值，实际次数最多再多 {tag_error} 次" if tag_error else None,
+        box=box.ROUNDED
+    )
     tags_table.add_column("排名", style="cyan")
     tags_table.add_column("标签", style="green")
-    tags_table.add_column("使用次数", style="magenta")
+    tags_table.add_column("使用次数 (下限)" if tag_error else "使用次数", style="magenta")
     
     for i, (tag, count) in enumerate(analysis['top_tags'][:10], 1):
-        tags_table.add_row(f"#{i}", tag, f"{count}次")
+        tags_table.add_row(f"#{i}", tag, f"≥{count}次" if tag_error else f"{count}次")
     
     console.print(tags_table)
     
@@ -108,21 +120,75 @@ def display_analysis_rich(analysis: dict):
     console.print(Panel(rec_text, title="💡 爆款建议 / Recommendations", border_style="green"))
 
 
+def display_alerts_rich(alerts: list):
+    """Display viral-velocity alerts with Rich formatting"""
+    if not alerts:
+        console.print(Panel("暂无爆发信号 / No breakouts detected",
+                            title="🚨 爆发预警 / Breakout Alerts", border_style="dim"))
+        return
+
+    alert_table = Table(box=box.SIMPLE)
+    alert_table.add_column("维度", style="cyan")
+    alert_table.add_column("对象", style="green")
+    alert_table.add_column("Z分数", style="magenta")
+    alert_table.add_column("速度", style="yellow")
+    alert_table.add_column("批次", style="dim")
+
+    for alert in alerts:
+        if alert['type'] == 'video':
+            velocity = f"{alert['views']:,} 次"
+        elif alert['velocity'] is None:
+            velocity = "🆕 新出现"
+        else:
+            velocity = f"x{alert['velocity']}"
+        alert_table.add_row(
+            alert['dimension'],
+            alert.get('title') or alert['key'],
+            f"{alert['z_score']:.2f}",
+            velocity,
+            f"#{alert['batch']}"
+        )
+
+    console.print(Panel(alert_table, title="🚨 爆发预警 / Breakout Alerts", border_style="red"))
+
+
+def generate_charts_rich(analysis: dict, config: Config):
+    """Generate charts if enabled in config and list their paths"""
+    if 'charts' not in config.get('reporter.formats', []):
+        return
+    
+    console.print("\n[cyan]📊 正在生成图表...[/cyan]")
+    
+    chart_gen = ChartGenerator(
+        output_dir=config.get('reporter.output_dir', 'generated/charts')
+    )
+    
+    charts = chart_gen.generate_all_charts(analysis)
+    
+    console.print("\n[green]✅ 图表已生成:[/green]")
+    for chart_type, path in charts.items():
+        console.print(f"  • {chart_type}: [blue]{path}[/blue]")
+
+
 def main():
     """Main entry point with Rich UI"""
     
     # Load config
     config = Config()
     
+    # alerts --json must keep stdout free of Rich formatting
+    json_output = sys.argv[1:2] == ["alerts"] and "--json" in sys.argv[2:]
+    
     # Print header
-    console.print(Panel.fit(
-        "[bold cyan]🔥 抖音爆款分析系统 v2.0[/bold cyan]\n"
-        "[dim]Douyin Viral Video Analyzer[/dim]",
-        border_style="cyan"
-    ))
+    if not json_output:
+        console.print(Panel.fit(
+            "[bold cyan]🔥 抖音爆款分析系统 v2.0[/bold cyan]\n"
+            "[dim]Douyin Viral Video Analyzer[/dim]",
+            border_style="cyan"
+        ))
     
     if len(sys.argv) < 2:
-        console.print("[red]❌ 用法: python main.py [scrape|analyze|report][/red]")
+        console.print("[red]❌ 用法: python main.py [scrape|analyze|report|alerts|serve|partial|merge|fanout][/red]")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -143,6 +209,29 @@ def main():
         
         analyzer.save_videos(videos)
         console.print(f"[green]✅ 成功采集 {len(videos)} 个视频数据[/green]")
+        
+        # Score the batch against the running baselines
+        state_path = config.get('analyzer.velocity.state_path', 'generated/velocity_state.json')
+        scorer = VelocityScorer.from_config(config).load(state_path)
+        alerts = scorer.update(videos)
+        scorer.save(state_path)
+        
+        write_alerts_jsonl(
+            alerts, config.get('analyzer.velocity.alerts_path', 'generated/alerts.jsonl')
+        )
+        display_alerts_rich(alerts)
+    
+    elif command == "alerts":
+        alerts = read_alerts_jsonl(
+            config.get('analyzer.velocity.alerts_path', 'generated/alerts.jsonl'),
+            limit=20
+        )
+        
+        if json_output:
+            for alert in alerts:
+                print(json.dumps(alert, ensure_ascii=False))
+        else:
+            display_alerts_rich(alerts)
     
     elif command == "analyze":
         console.print("[cyan]📊 正在分析爆款规律...[/cyan]")
@@ -165,19 +254,70 @@ def main():
         # Display Rich output
         display_analysis_rich(analysis)
         
-        # Generate charts
-        if 'charts' in config.get('reporter.formats', []):
-            console.print("\n[cyan]📊 正在生成图表...[/cyan]")
-            
-            chart_gen = ChartGenerator(
-                output_dir=config.get('reporter.output_dir', 'generated/charts')
+        generate_charts_rich(analysis, config)
+    
+    elif command == "partial":
+        # Compute this node's partial aggregate for the coordinator
+        hours = config.get('analyzer.shard.window_hours', 24)
+        partial = compute_partial(
+            db_path, hours=hours,
+            tag_capacity=config.get('analyzer.shard.tag_capacity')
+        )
+        
+        out_path = sys.argv[2] if len(sys.argv) > 2 else str(
+            Path(config.get('analyzer.shard.partials_dir', 'generated/partials'))
+            / f"{partial['nodes'][0].replace(':', '_')}.json"
+        )
+        save_partial(partial, out_path)
+        console.print(f"[green]✅ 已生成分片聚合 ({partial['count']} 个视频): [blue]{out_path}[/blue][/green]")
+    
+    elif command in ("merge", "fanout"):
+        paths = sys.argv[2:]
+        if not paths:
+            console.print(f"[red]❌ 用法: python main.py {command} <文件1> <文件2> ...[/red]")
+            sys.exit(1)
+        
+        missing = [p for p in paths if not Path(p).is_file()]
+        if missing:
+            console.print(f"[red]❌ 文件不存在: {', '.join(missing)}[/red]")
+            sys.exit(1)
+        
+        tag_capacity = config.get('analyzer.shard.tag_capacity')
+        if command == "merge":
+            console.print(f"[cyan]🔗 正在合并 {len(paths)} 个分片聚合...[/cyan]")
+            try:
+                merged = merge_partials([load_partial(p) for p in paths], tag_capacity)
+            except (OSError, ValueError) as e:
+                console.print(f"[red]❌ {e}[/red]")
+                sys.exit(1)
+        else:
+            console.print(f"[cyan]🔗 正在并行分析 {len(paths)} 个数据库...[/cyan]")
+            merged = fanout_partials(
+                paths,
+                hours=config.get('analyzer.shard.window_hours', 24),
+                tag_capacity=tag_capacity,
+                workers=config.get('analyzer.shard.workers')
             )
-            
-            charts = chart_gen.generate_all_charts(analysis)
-            
-            console.print("\n[green]✅ 图表已生成:[/green]")
-            for chart_type, path in charts.items():
-                console.print(f"  • {chart_type}: [blue]{path}[/blue]")
+        
+        analysis = finalize_partial(merged)
+        if "error" in analysis:
+            console.print(f"[red]❌ {analysis['error']}[/red]")
+            sys.exit(1)
+        
+        console.print(f"[dim]节点: {', '.join(merged['nodes'])}[/dim]")
+        display_analysis_rich(analysis)
+        
+        generate_charts_rich(analysis, config)
+    
+    elif command == "serve":
+        server = AnalysisServer.from_config(config)
+        console.print(f"[cyan]🌐 API 服务已启动: http://{server.host}:{server.port}[/cyan]")
+        console.print("[dim]/analysis  /tags  /trends  /charts/{duration|tags|music|categories}[/dim]")
+        
+        try:
+            server.run()
+        except KeyboardInterrupt:
+            console.print("[yellow]👋 已停止[/yellow]")
     
     else:
         console.print(f"[red]❌ 未知命令: {command}[/red]")
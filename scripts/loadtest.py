@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Load test for the local analysis API
+
+Usage: python scripts/loadtest.py [--url http://127.0.0.1:8080] [--paths /analysis,/tags]
+                                  [--concurrency 32] [--duration 10] [--conditional]
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    """Read one HTTP/1.1 response and discard its body"""
+    raw = await reader.readuntil(b"\r\n\r\n")
+    lines = raw.decode('latin-1').split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers
+
+
+async def worker(host: str, port: int, paths: List[str], deadline: float,
+                 conditional: bool, latencies: List[float], statuses: Dict[int, int]):
+    """Issue requests over one keep-alive connection until the deadline"""
+    reader, writer = await asyncio.open_connection(host, port)
+    etags: Dict[str, Optional[str]] = {}
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+            if conditional and etags.get(path):
+                request += f"If-None-Match: {etags[path]}\r\n"
+            request += "\r\n"
+
+            start = time.perf_counter()
+            writer.write(request.encode('latin-1'))
+            await writer.drain()
+            status, headers = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+
+            statuses[status] = statuses.get(status, 0) + 1
+            if 'etag' in headers:
+                etags[path] = headers['etag']
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def run(url: str, paths: List[str], concurrency: int, duration: float, conditional: bool):
+    parts = urlsplit(url)
+    host, port = parts.hostname or '127.0.0.1', parts.port or 80
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        worker(host, port, paths, deadline, conditional, latencies, statuses)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"url:          {url} {','.join(paths)}")
+    print(f"concurrency:  {concurrency}  conditional: {conditional}")
+    print(f"requests:     {len(latencies)} in {elapsed:.2f}s")
+    print(f"throughput:   {len(latencies) / elapsed:,.1f} req/s")
+    print(f"latency p50:  {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"latency p99:  {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"status codes: {dict(sorted(statuses.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local analysis API")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--paths', default='/analysis,/tags,/trends',
+                        help="comma-separated request paths, issued round-robin")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--conditional', action='store_true',
+                        help="revalidate with If-None-Match after the first response")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.paths.split(','), args.concurrency,
+                    args.duration, args.conditional))
+
+
+if __name__ == "__main__":
+    main()
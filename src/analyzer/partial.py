@@ -0,0 +1,196 @@
+"""
+Mergeable partial aggregates for sharded analysis
+"""
+import json
+import socket
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PARTIAL_VERSION = 1
+
+
+def _misra_gries(counters: Dict[str, int], capacity: int) -> int:
+    """Trim counters to capacity in place, returning the count subtracted from each"""
+    if len(counters) <= capacity:
+        return 0
+    cutoff = sorted(counters.values(), reverse=True)[capacity]
+    for key in list(counters):
+        counters[key] -= cutoff
+        if counters[key] <= 0:
+            del counters[key]
+    return cutoff
+
+
+def compute_partial(db_path: str, hours: int = 24, tag_capacity: Optional[int] = None,
+                    node: Optional[str] = None) -> Dict:
+    """Aggregate one database's window into a compact, mergeable partial
+
+    Sums and all histograms are exact, so the partial's size depends on
+    distinct keys, not on rows. With tag_capacity set, tags are instead kept
+    as a Misra-Gries heavy-hitter sketch of at most that many counters; the
+    sketch undercounts every tag by up to its reported error.
+    """
+    # Read-only so a mistyped path fails instead of creating an empty database
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    window = f"-{int(hours)} hours"
+
+    cursor.execute("""
+        SELECT COUNT(*), COALESCE(SUM(views), 0), COALESCE(SUM(likes), 0),
+               COALESCE(SUM(duration), 0), MIN(scraped_at), MAX(scraped_at)
+        FROM videos
+        WHERE scraped_at >= datetime('now', ?)
+    """, (window,))
+    count, views, likes, duration, first_seen, last_seen = cursor.fetchone()
+
+    histograms = {}
+    for name, column in (('duration', 'duration'), ('music', 'music'), ('category', 'category')):
+        cursor.execute(f"""
+            SELECT {column}, COUNT(*) FROM videos
+            WHERE scraped_at >= datetime('now', ?)
+            GROUP BY {column}
+        """, (window,))
+        histograms[name] = dict(cursor.fetchall())
+
+    cursor.execute("""
+        SELECT j.value, COUNT(*) FROM videos, json_each(videos.tags) AS j
+        WHERE videos.scraped_at >= datetime('now', ?)
+        GROUP BY j.value
+    """, (window,))
+    tags = dict(cursor.fetchall())
+    conn.close()
+
+    return {
+        "version": PARTIAL_VERSION,
+        "nodes": [node or f"{socket.gethostname()}:{Path(db_path).name}"],
+        "window_hours": hours,
+        "computed_at": datetime.now().isoformat(timespec='seconds'),
+        "first_seen": first_seen,
+        "last_seen": last_seen,
+        "count": count,
+        "sums": {"views": views, "likes": likes, "duration": duration},
+        "duration_hist": histograms['duration'],
+        "music_hist": histograms['music'],
+        "category_hist": histograms['category'],
+        "tags": {
+            "capacity": tag_capacity,
+            "error": _misra_gries(tags, tag_capacity) if tag_capacity else 0,
+            "counters": tags
+        }
+    }
+
+
+def merge_partials(partials: List[Dict], tag_capacity: Optional[int] = None) -> Dict:
+    """Merge partials into one partial of the same shape
+
+    Cost is linear in the number of distinct keys across the inputs. Tags
+    stay exact unless a capacity is given or any input is a sketch; merged
+    sketch counts undercount by at most the summed error.
+    """
+    if not partials:
+        raise ValueError("no partials to merge")
+    for partial in partials:
+        if partial.get('version') != PARTIAL_VERSION:
+            raise ValueError(f"unsupported partial version: {partial.get('version')}")
+    windows = sorted({p['window_hours'] for p in partials})
+    if len(windows) > 1:
+        raise ValueError(f"partials cover different windows: {', '.join(f'{w}h' for w in windows)}")
+
+    capacity = tag_capacity or max(
+        (p['tags']['capacity'] for p in partials if p['tags']['capacity']), default=None
+    )
+    merged = {
+        "version": PARTIAL_VERSION,
+        "nodes": [],
+        "window_hours": windows[0],
+        "computed_at": datetime.now().isoformat(timespec='seconds'),
+        "first_seen": min((p['first_seen'] for p in partials if p['first_seen']), default=None),
+        "last_seen": max((p['last_seen'] for p in partials if p['last_seen']), default=None),
+        "count": 0,
+        "sums": {"views": 0, "likes": 0, "duration": 0},
+        "duration_hist": {},
+        "music_hist": {},
+        "category_hist": {},
+        "tags": {"capacity": capacity, "error": 0, "counters": {}}
+    }
+
+    for partial in partials:
+        merged['nodes'].extend(partial['nodes'])
+        merged['count'] += partial['count']
+        for key, value in partial['sums'].items():
+            merged['sums'][key] += value
+        for hist in ('duration_hist', 'music_hist', 'category_hist'):
+            target = merged[hist]
+            for key, value in partial[hist].items():
+                target[key] = target.get(key, 0) + value
+        counters = merged['tags']['counters']
+        for key, value in partial['tags']['counters'].items():
+            counters[key] = counters.get(key, 0) + value
+        merged['tags']['error'] += partial['tags']['error']
+
+    if capacity:
+        merged['tags']['error'] += _misra_gries(merged['tags']['counters'], capacity)
+    return merged
+
+
+def finalize_partial(partial: Dict) -> Dict:
+    """Turn a (merged) partial into the analyze_patterns result dict
+
+    If the tag sketch has dropped counts, tag_error is added and the top_tags
+    counts are lower bounds: the true count is at most count + tag_error.
+    """
+    total_videos = partial['count']
+    if not total_videos:
+        return {"error": "No data available"}
+
+    duration_dist = dict(sorted(partial['duration_hist'].items()))
+
+    def top(counts: Dict[str, int], limit: int) -> List[tuple]:
+        # Same (-count, key) ordering as analyze_patterns, so ties match
+        return sorted(counts.items(), key=lambda x: (-x[1], x[0]))[:limit]
+
+    analysis = {
+        "total_videos": total_videos,
+        "avg_views": int(partial['sums']['views'] / total_videos),
+        "avg_likes": int(partial['sums']['likes'] / total_videos),
+        "avg_duration": int(partial['sums']['duration'] / total_videos),
+        "optimal_duration": min(duration_dist, key=lambda d: (-duration_dist[d], d)),
+        "duration_distribution": duration_dist,
+        "top_tags": top(partial['tags']['counters'], 5),
+        "top_music": top(partial['music_hist'], 3),
+        "top_categories": top(partial['category_hist'], 3)
+    }
+    if partial['tags']['error']:
+        analysis['tag_error'] = partial['tags']['error']
+    return analysis
+
+
+def save_partial(partial: Dict, path: str):
+    """Write a partial as compact JSON"""
+    partial_path = Path(path)
+    partial_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(partial_path, 'w', encoding='utf-8') as f:
+        json.dump(partial, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_partial(path: str) -> Dict:
+    """Read a partial written by save_partial"""
+    with open(path, 'r', encoding='utf-8') as f:
+        partial = json.load(f)
+    # JSON object keys are strings; durations are ints in analyze_patterns
+    partial['duration_hist'] = {int(k): v for k, v in partial['duration_hist'].items()}
+    return partial
+
+
+def fanout_partials(db_paths: List[str], hours: int = 24, tag_capacity: Optional[int] = None,
+                    workers: Optional[int] = None) -> Dict:
+    """Compute partials for several local databases in a process pool and merge them"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = list(pool.map(
+            compute_partial, db_paths,
+            [hours] * len(db_paths), [tag_capacity] * len(db_paths)
+        ))
+    return merge_partials(partials, tag_capacity)
@@ -0,0 +1,255 @@
+"""
+Online viral-velocity scoring with EWMA baselines
+"""
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DIMENSIONS = ('tag', 'music', 'category')
+
+STATE_VERSION = 2
+
+
+class VelocityScorer:
+    """Incremental breakout detector over ingest batches
+
+    Each tag, music and category keeps an exponentially weighted mean of its
+    share of every batch and, with a slower weight, the variance of its
+    deviation from that mean. The standard deviation used for z-scores never
+    drops below the binomial sampling noise of a batch. Keys missing from a
+    batch are decayed lazily when they next appear, so an update touches only
+    the keys present in the batch. A global baseline of the per-batch moments
+    of log10(views) is used to flag individual videos.
+    """
+
+    def __init__(self, alpha: float = 0.3, z_threshold: float = 4.0,
+                 velocity_threshold: float = 3.0, min_batches: int = 3,
+                 min_count: int = 2, prune_below: float = 1e-4,
+                 variance_alpha: float = 0.05):
+        self.alpha = alpha
+        self.variance_alpha = variance_alpha
+        self.z_threshold = z_threshold
+        self.velocity_threshold = velocity_threshold
+        self.min_batches = min_batches
+        self.min_count = min_count
+        self.prune_below = prune_below
+        # Missed batches after which a baseline is below prune_below of its value
+        self.decay_steps = max(int(math.ceil(math.log(prune_below) / math.log(1 - alpha))), 1)
+
+        self.batches = 0
+        # dimension -> key -> [mean, variance, last_batch, seen]
+        self.keys: Dict[str, Dict[str, list]] = {dim: {} for dim in DIMENSIONS}
+        # [mean, mean_sq, seen] of log10(views)
+        self.views = [0.0, 0.0, 0]
+
+    @classmethod
+    def from_config(cls, config) -> 'VelocityScorer':
+        """Build a scorer from the analyzer.velocity config section"""
+        return cls(
+            alpha=config.get('analyzer.velocity.alpha', 0.3),
+            variance_alpha=config.get('analyzer.velocity.variance_alpha', 0.05),
+            z_threshold=config.get('analyzer.velocity.z_threshold', 4.0),
+            velocity_threshold=config.get('analyzer.velocity.velocity_threshold', 3.0),
+            min_batches=config.get('analyzer.velocity.min_batches', 3),
+            min_count=config.get('analyzer.velocity.min_count', 2)
+        )
+
+    def _decay(self, entry: list):
+        """Bring a key's baseline up to date with the batches it missed"""
+        missed = self.batches - entry[2]
+        if missed > 0:
+            # Each missed batch is a zero share; past decay_steps the mean is
+            # negligible and both moments simply shrink geometrically
+            steps = min(missed, self.decay_steps)
+            for _ in range(steps):
+                self._observe(entry, 0.0)
+            entry[0] *= (1 - self.alpha) ** (missed - steps)
+            entry[1] *= (1 - self.variance_alpha) ** (missed - steps)
+            entry[2] = self.batches
+
+    def _observe(self, entry: list, value: float):
+        """Fold one share into an entry's mean and deviation variance"""
+        diff = value - entry[0]
+        entry[0] += self.alpha * diff
+        entry[1] += self.variance_alpha * (diff * diff - entry[1])
+
+    def _score(self, mean: float, std: float, value: float) -> Dict[str, float]:
+        """Z-score and velocity of a value against a baseline"""
+        z_score = (value - mean) / std if std > 1e-9 else 0.0
+        velocity = value / mean if mean > 1e-9 else math.inf
+        return {"z_score": z_score, "velocity": velocity}
+
+    def update(self, videos: List[Dict]) -> List[Dict]:
+        """Score a batch of videos, fold it into the baselines and return alerts"""
+        if not videos:
+            return []
+
+        batch_size = len(videos)
+        counts: Dict[str, Dict[str, int]] = {dim: {} for dim in DIMENSIONS}
+        for video in videos:
+            tags = video.get('tags') or []
+            if isinstance(tags, str):
+                tags = json.loads(tags)
+            for tag in set(tags):
+                counts['tag'][tag] = counts['tag'].get(tag, 0) + 1
+            for dim in ('music', 'category'):
+                key = video.get(dim)
+                if key:
+                    counts[dim][key] = counts[dim].get(key, 0) + 1
+
+        warmed_up = self.batches >= self.min_batches
+        detected_at = datetime.now().isoformat(timespec='seconds')
+        alerts = []
+
+        for dim, dim_counts in counts.items():
+            baselines = self.keys[dim]
+            for key, count in dim_counts.items():
+                share = count / batch_size
+                entry = baselines.get(key)
+                if entry is None:
+                    if self.batches == 0:
+                        # Keys of the first batch seed their baseline from it
+                        entry = baselines[key] = [share, share * (1 - share) / batch_size, 0, 0]
+                    else:
+                        # Keys appearing later start from a zero baseline as if absent so far
+                        entry = baselines[key] = [0.0, 0.0, self.batches, 0]
+                self._decay(entry)
+
+                # Floor the std at the binomial noise of a share in this batch
+                p = max(entry[0], 1 / batch_size)
+                std = max(math.sqrt(entry[1]), math.sqrt(p * (1 - p) / batch_size))
+                score = self._score(entry[0], std, share)
+
+                # Keys new to a running scorer always count as breakouts; the
+                # z and velocity tests need min_batches observations of the key
+                is_new = entry[3] == 0
+                established = entry[3] >= self.min_batches
+                if warmed_up and count >= self.min_count and (is_new or established and (
+                        score['z_score'] >= self.z_threshold
+                        or score['velocity'] >= self.velocity_threshold)):
+                    alerts.append({
+                        "type": "breakout",
+                        "dimension": dim,
+                        "key": key,
+                        "count": count,
+                        "share": round(share, 4),
+                        "baseline": round(entry[0], 4),
+                        "z_score": round(score['z_score'], 2),
+                        "velocity": None if math.isinf(score['velocity'])
+                        else round(score['velocity'], 2),
+                        "batch": self.batches + 1,
+                        "detected_at": detected_at
+                    })
+
+                self._observe(entry, share)
+                entry[2] = self.batches + 1
+                entry[3] += 1
+
+        view_logs = [math.log10(max(video.get('views') or 0, 1)) for video in videos]
+        if warmed_up:
+            mean = self.views[0]
+            std = math.sqrt(max(self.views[1] - mean * mean, 0.0))
+            for video, value in zip(videos, view_logs):
+                score = self._score(mean, std, value)
+                if score['z_score'] >= self.z_threshold:
+                    alerts.append({
+                        "type": "video",
+                        "dimension": "video",
+                        "key": video.get('video_id'),
+                        "title": video.get('title'),
+                        "views": video.get('views'),
+                        "z_score": round(score['z_score'], 2),
+                        "batch": self.batches + 1,
+                        "detected_at": detected_at
+                    })
+        batch_mean = sum(view_logs) / batch_size
+        batch_mean_sq = sum(value * value for value in view_logs) / batch_size
+        if self.views[2] == 0:
+            self.views[0], self.views[1] = batch_mean, batch_mean_sq
+        else:
+            self.views[0] += self.alpha * (batch_mean - self.views[0])
+            self.views[1] += self.alpha * (batch_mean_sq - self.views[1])
+        self.views[2] += batch_size
+
+        self.batches += 1
+        alerts.sort(key=lambda a: a['z_score'], reverse=True)
+        return alerts
+
+    def top_trending(self, dimension: str, limit: int = 10) -> List[Dict]:
+        """Return the keys of a dimension with the highest current baseline"""
+        rows = []
+        for key, entry in self.keys.get(dimension, {}).items():
+            factor = (1 - self.alpha) ** max(self.batches - entry[2], 0)
+            rows.append({"key": key, "baseline": round(entry[0] * factor, 4),
+                         "seen": entry[3]})
+        rows.sort(key=lambda r: r['baseline'], reverse=True)
+        return rows[:limit]
+
+    def to_dict(self) -> Dict:
+        """Serialize state, dropping keys whose baseline has decayed away"""
+        keys = {}
+        for dim, baselines in self.keys.items():
+            kept = {}
+            for key, entry in baselines.items():
+                self._decay(entry)
+                if entry[0] >= self.prune_below:
+                    kept[key] = [round(entry[0], 6), round(entry[1], 8),
+                                 entry[2], entry[3]]
+            keys[dim] = kept
+        return {
+            "version": STATE_VERSION,
+            "alpha": self.alpha,
+            "batches": self.batches,
+            "views": [round(self.views[0], 6), round(self.views[1], 6), self.views[2]],
+            "keys": keys
+        }
+
+    def load_dict(self, state: Dict):
+        """Restore state produced by to_dict"""
+        if state.get('version') != STATE_VERSION:
+            return
+        self.batches = state.get('batches', 0)
+        self.views = list(state.get('views', [0.0, 0.0, 0]))
+        for dim in DIMENSIONS:
+            self.keys[dim] = {k: list(v) for k, v in state.get('keys', {}).get(dim, {}).items()}
+
+    def load(self, path: str) -> 'VelocityScorer':
+        """Load state from a JSON file if it exists"""
+        state_path = Path(path)
+        if state_path.exists():
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.load_dict(json.load(f))
+        return self
+
+    def save(self, path: str):
+        """Atomically write state to a JSON file"""
+        state_path = Path(path)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_path.with_name(state_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, state_path)
+
+
+def write_alerts_jsonl(alerts: List[Dict], path: str):
+    """Append alerts to a JSON lines file"""
+    if not alerts:
+        return
+    alert_path = Path(path)
+    alert_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(alert_path, 'a', encoding='utf-8') as f:
+        for alert in alerts:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+def read_alerts_jsonl(path: str, limit: Optional[int] = None) -> List[Dict]:
+    """Read alerts back from a JSON lines file, most recent last"""
+    alert_path = Path(path)
+    if not alert_path.exists():
+        return []
+    with open(alert_path, 'r', encoding='utf-8') as f:
+        alerts = [json.loads(line) for line in f if line.strip()]
+    return alerts[-limit:] if limit else alerts
@@ -0,0 +1,286 @@
+"""
+Embedded HTTP/JSON query API for analysis results
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from douyin_analyzer import DouyinViralAnalyzer
+from src.analyzer.velocity import DIMENSIONS, VelocityScorer, read_alerts_jsonl
+from src.reporter.charts import ChartGenerator
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error'
+}
+
+CHARTS = ('duration', 'tags', 'music', 'categories')
+
+
+class AnalysisServer:
+    """Serve analysis, trend, tag and chart results as JSON
+
+    Responses carry an ETag derived from the data version (the stat of the
+    database, the velocity state and the alert log, plus a time bucket for the
+    sliding one-day window), so dashboards can revalidate with If-None-Match
+    and get a 304 without any query running. Queries run on a thread pool and
+    identical concurrent requests share one computation. Bodies are buffered
+    whole, since they are cached per ETag and stay small (the largest is a
+    few KB of chart JSON).
+    """
+
+    def __init__(self, db_path: str = "viral_videos.db", host: str = "127.0.0.1",
+                 port: int = 8080, workers: int = 4, window_ttl: int = 60,
+                 state_path: str = "generated/velocity_state.json",
+                 alerts_path: str = "generated/alerts.jsonl",
+                 cache_size: int = 256,
+                 max_body: int = 65536):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.window_ttl = window_ttl
+        self.state_path = state_path
+        self.alerts_path = alerts_path
+        self.cache_size = cache_size
+        self.max_body = max_body
+
+        self.analyzer = DouyinViralAnalyzer(db_path=db_path)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._chart_gen: Optional[ChartGenerator] = None
+
+        # target -> (etag, body)
+        self._cache: Dict[str, Tuple[str, bytes]] = {}
+        # etag -> future of body
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.routes: Dict[str, Callable[[Dict[str, str], str], object]] = {
+            '/health': lambda params, name: {"status": "ok"},
+            '/analysis': lambda params, name: self.analyzer.analyze_patterns(),
+            '/tags': self._query_tags,
+            '/trends': self._query_trends,
+            '/charts': self._query_chart
+        }
+
+    @classmethod
+    def from_config(cls, config) -> 'AnalysisServer':
+        """Build a server from the api config section"""
+        return cls(
+            db_path=config.get('database.path', 'viral_videos.db'),
+            host=config.get('api.host', '127.0.0.1'),
+            port=config.get('api.port', 8080),
+            workers=config.get('api.workers', 4),
+            window_ttl=config.get('api.window_ttl', 60),
+            state_path=config.get('analyzer.velocity.state_path', 'generated/velocity_state.json'),
+            alerts_path=config.get('analyzer.velocity.alerts_path', 'generated/alerts.jsonl')
+        )
+
+    # ---- queries (run on the worker pool) ----
+
+    def _query_tags(self, params: Dict[str, str], name: str):
+        tag_counts = self.analyzer.get_tag_counts()
+        if 'limit' in params:
+            tag_counts = tag_counts[:int(params['limit'])]
+        return [{"tag": tag, "count": count} for tag, count in tag_counts]
+
+    def _query_trends(self, params: Dict[str, str], name: str):
+        limit = int(params.get('limit', 10))
+        scorer = VelocityScorer().load(self.state_path)
+        return {
+            "batches": scorer.batches,
+            "trending": {dim: scorer.top_trending(dim, limit) for dim in DIMENSIONS},
+            "alerts": read_alerts_jsonl(self.alerts_path, limit=limit)
+        }
+
+    def _query_chart(self, params: Dict[str, str], name: str):
+        analysis = self.analyzer.analyze_patterns()
+        if "error" in analysis:
+            return analysis
+        if self._chart_gen is None:
+            self._chart_gen = ChartGenerator()
+
+        if name == 'duration':
+            fig = self._chart_gen.build_duration_figure(analysis['duration_distribution'])
+        elif name == 'tags':
+            fig = self._chart_gen.build_tag_figure(analysis['top_tags'][:10])
+        elif name == 'music':
+            fig = self._chart_gen.build_music_figure(analysis['top_music'][:10])
+        else:
+            fig = self._chart_gen.build_category_figure(analysis['top_categories'])
+        return json.loads(fig.to_json())
+
+    # ---- versioning ----
+
+    def data_version(self) -> str:
+        """Cheap fingerprint of everything the endpoints read"""
+        parts = [str(int(time.time() // self.window_ttl))]
+        for path in (self.db_path, self.db_path + '-wal', self.state_path, self.alerts_path):
+            try:
+                st = os.stat(path)
+                parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append("-")
+        return "|".join(parts)
+
+    def _etag(self, target: str, version: str) -> str:
+        digest = hashlib.blake2b(f"{version}#{target}".encode(), digest_size=12)
+        return f'"{digest.hexdigest()}"'
+
+    async def _render(self, target: str, handler, params: Dict[str, str],
+                      name: str, etag: str) -> bytes:
+        """Compute a response body once per ETag, sharing in-flight work"""
+        cached = self._cache.get(target)
+        if cached and cached[0] == etag:
+            return cached[1]
+
+        future = self._inflight.get(etag)
+        if future is None:
+            loop = asyncio.get_running_loop()
+
+            def run():
+                result = handler(params, name)
+                return json.dumps(result, ensure_ascii=False, default=str).encode('utf-8')
+
+            future = loop.run_in_executor(self.executor, run)
+            self._inflight[etag] = future
+            try:
+                body = await asyncio.shield(future)
+            finally:
+                self._inflight.pop(etag, None)
+            if len(self._cache) >= self.cache_size and target not in self._cache:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[target] = (etag, body)
+            return body
+        return await asyncio.shield(future)
+
+    # ---- HTTP ----
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, headers: Dict[str, str],
+                    body: bytes = b"", head_only: bool = False, keep_alive: bool = True):
+        headers = dict(headers)
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        if status != 304:
+            headers['Content-Length'] = str(len(body))
+
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        writer.write(head.encode('latin-1'))
+
+        if body and not head_only and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+    async def _error(self, writer, status: int, message: str, keep_alive: bool = True):
+        body = json.dumps({"error": message}, ensure_ascii=False).encode('utf-8')
+        await self._send(writer, status, {'Content-Type': 'application/json; charset=utf-8'},
+                         body, keep_alive=keep_alive)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one keep-alive connection"""
+        try:
+            while True:
+                try:
+                    raw = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = raw.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._error(writer, 400, "malformed request line", keep_alive=False)
+                    break
+
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                # Bodies are never used; drain them so they are not read as the next request
+                length = headers.get('content-length', '0')
+                if 'transfer-encoding' in headers or not (length.isascii() and length.isdigit()) \
+                        or int(length) > self.max_body:
+                    keep_alive = False
+                elif int(length):
+                    try:
+                        await reader.readexactly(int(length))
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+
+                await self._dispatch(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, writer, method: str, target: str,
+                        headers: Dict[str, str], keep_alive: bool):
+        if method not in ('GET', 'HEAD'):
+            await self._error(writer, 405, f"method {method} not allowed", keep_alive)
+            return
+
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        path = url.path.rstrip('/') or '/'
+        base, _, name = path[1:].partition('/')
+        handler = self.routes.get('/' + base)
+        if handler is None or (name and base != 'charts'):
+            await self._error(writer, 404, f"unknown endpoint {url.path}", keep_alive)
+            return
+        if base == 'charts' and name not in CHARTS:
+            await self._error(writer, 404, f"unknown chart '{name}', expected one of {', '.join(CHARTS)}",
+                              keep_alive)
+            return
+
+        # limit is a positive cap on every endpoint; omit it for the default
+        limit = params.get('limit')
+        if limit is not None and not (limit.isascii() and limit.isdigit() and int(limit) > 0):
+            await self._error(writer, 400, "limit must be a positive integer", keep_alive)
+            return
+
+        etag = self._etag(target, self.data_version())
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if_none_match = headers.get('if-none-match')
+        if if_none_match and (if_none_match.strip() == '*'
+                              or etag in [t.strip() for t in if_none_match.split(',')]):
+            await self._send(writer, 304, response_headers, keep_alive=keep_alive)
+            return
+
+        try:
+            body = await self._render(target, handler, params, name, etag)
+        except Exception as e:
+            await self._error(writer, 500, f"{type(e).__name__}: {e}", keep_alive)
+            return
+
+        response_headers['Content-Type'] = 'application/json; charset=utf-8'
+        await self._send(writer, 200, response_headers, body,
+                         head_only=(method == 'HEAD'), keep_alive=keep_alive)
+
+    async def serve_forever(self):
+        """Bind and serve until cancelled"""
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """Blocking entry point"""
+        try:
+            asyncio.run(self.serve_forever())
+        finally:
+            self.executor.shutdown(wait=False)
@@ -14,8 +14,8 @@ class ChartGenerator:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
     
-    def generate_duration_chart(self, duration_dist: Dict[int, int]) -> str:
-        """Generate duration distribution bar chart"""
+    def build_duration_figure(self, duration_dist: Dict[int, int]) -> go.Figure:
+        """Build duration distribution bar figure"""
         durations = sorted(duration_dist.keys())
         counts = [duration_dist[d] for d in durations]
         
@@ -37,12 +37,17 @@ class ChartGenerator:
             height=500
         )
         
+        return fig
+    
+    def generate_duration_chart(self, duration_dist: Dict[int, int]) -> str:
+        """Generate duration distribution bar chart"""
+        fig = self.build_duration_figure(duration_dist)
         output_path = self.output_dir / 'duration_distribution.html'
         fig.write_html(str(output_path))
         return str(output_path)
     
-    def generate_tag_chart(self, top_tags: List[Tuple[str, int]]) -> str:
-        """Generate tag frequency chart"""
+    def build_tag_figure(self, top_tags: List[Tuple[str, int]], tag_error: int = 0) -> go.Figure:
+        """Build tag frequency figure, marking counts as lower bounds if tag_error is set"""
         tags = [t[0] for t in top_tags]
         counts = [t[1] for t in top_tags]
         
@@ -58,19 +63,26 @@ class ChartGenerator:
         ])
         
         fig.update_layout(
-            title='热门标签 Top 10 / Top Tags',
-            xaxis_title='使用次数 / Count',
+            title='热门标签 Top 10 / Top Tags' + (
+                f' (下限估算，误差≤{tag_error})' if tag_error else ''
+            ),
+            xaxis_title='使用次数 (下限) / Count (lower bound)' if tag_error else '使用次数 / Count',
             yaxis_title='标签 / Tag',
             template='plotly_white',
             height=600
         )
         
+        return fig
+    
+    def generate_tag_chart(self, top_tags: List[Tuple[str, int]], tag_error: int = 0) -> str:
+        """Generate tag frequency chart"""
+        fig = self.build_tag_figure(top_tags, tag_error)
         output_path = self.output_dir / 'top_tags.html'
         fig.write_html(str(output_path))
         return str(output_path)
     
-    def generate_music_chart(self, top_music: List[Tuple[str, int]]) -> str:
-        """Generate music trend chart"""
+    def build_music_figure(self, top_music: List[Tuple[str, int]]) -> go.Figure:
+        """Build music trend figure"""
         music = [m[0] for m in top_music]
         counts = [m[1] for m in top_music]
         
@@ -93,12 +105,17 @@ class ChartGenerator:
             xaxis_tickangle=-45
         )
         
+        return fig
+    
+    def generate_music_chart(self, top_music: List[Tuple[str, int]]) -> str:
+        """Generate music trend chart"""
+        fig = self.build_music_figure(top_music)
         output_path = self.output_dir / 'top_music.html'
         fig.write_html(str(output_path))
         return str(output_path)
     
-    def generate_category_chart(self, top_categories: List[Tuple[str, int]]) -> str:
-        """Generate category pie chart"""
+    def build_category_figure(self, top_categories: List[Tuple[str, int]]) -> go.Figure:
+        """Build category pie figure"""
         categories = [c[0] for c in top_categories]
         counts = [c[1] for c in top_categories]
         
@@ -117,6 +134,11 @@ class ChartGenerator:
             height=500
         )
         
+        return fig
+    
+    def generate_category_chart(self, top_categories: List[Tuple[str, int]]) -> str:
+        """Generate category pie chart"""
+        fig = self.build_category_figure(top_categories)
         output_path = self.output_dir / 'category_distribution.html'
         fig.write_html(str(output_path))
         return str(output_path)
@@ -132,7 +154,8 @@ class ChartGenerator:
         
         if 'top_tags' in analysis:
             charts['tags'] = self.generate_tag_chart(
-                analysis['top_tags'][:10]  # Top 10
+                analysis['top_tags'][:10],  # Top 10
+                analysis.get('tag_error', 0)
             )
         
         if 'top_music' in analysis:
@@ -30,7 +30,23 @@ class Config:
             },
             'analyzer': {
                 'enable_ai': False,
-                'dimensions': ['duration', 'tags', 'music', 'category']
+                'dimensions': ['duration', 'tags', 'music', 'category'],
+                'velocity': {
+                    'alpha': 0.3,
+                    'variance_alpha': 0.05,
+                    'z_threshold': 4.0,
+                    'velocity_threshold': 3.0,
+                    'min_batches': 3,
+                    'min_count': 2,
+                    'state_path': 'generated/velocity_state.json',
+                    'alerts_path': 'generated/alerts.jsonl'
+                },
+                'shard': {
+                    'window_hours': 24,
+                    'tag_capacity': None,
+                    'workers': None,
+                    'partials_dir': 'generated/partials'
+                }
             },
             'reporter': {
                 'formats': ['text', 'charts'],
@@ -38,6 +54,12 @@ class Config:
             },
             'database': {
                 'path': 'viral_videos.db'
+            },
+            'api': {
+                'host': '127.0.0.1',
+                'port': 8080,
+                'workers': 4,
+                'window_ttl': 60
             }
         }
     